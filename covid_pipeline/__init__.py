@@ -1,4 +1,5 @@
-from dagster import Definitions
+import pandas as pd
+from dagster import Definitions, FilesystemIOManager
 from .assets import (
     leer_datos,
     limpiar_datos_para_checks,
@@ -6,12 +7,14 @@ from .assets import (
     metrica_incidencia_7d,
     metrica_factor_crec_7d,
     reporte_excel_covid,
-    check_fechas_futuras,
-    check_columnas_clave,
-    check_unicidad_country_date,
-    check_population_positiva,
-    check_new_cases_no_negativos
+    checks_calidad_datos
 )
+from .io_managers import ParquetIOManager
+
+# Copy-on-Write: los assets transforman sus entradas sin .copy() defensivos
+# (en pandas >= 3.0 siempre está activo y la opción está obsoleta)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 defs = Definitions(
     assets=[
@@ -23,10 +26,10 @@ defs = Definitions(
         reporte_excel_covid
     ],
     asset_checks=[
-        check_fechas_futuras,
-        check_columnas_clave,
-        check_unicidad_country_date,
-        check_population_positiva,
-        check_new_cases_no_negativos
-    ]
+        checks_calidad_datos
+    ],
+    resources={
+        "io_manager": FilesystemIOManager(base_dir="./dagster_storage"),
+        "parquet_io_manager": ParquetIOManager(base_dir="./dagster_storage")
+    }
 )
@@ -1,75 +1,108 @@
 # manual_analysis.py
+import os
+from functools import lru_cache
 import pandas as pd
 import requests
 import numpy as np
 
-# Descargar datos
-url = "https://catalog.ourworldindata.org/garden/covid/latest/compact/compact.csv"
-df = pd.read_csv(url)
+URL = "https://catalog.ourworldindata.org/garden/covid/latest/compact/compact.csv"
+CACHE_PARQUET = "compact_completo.parquet"
+CACHE_ETAG = "compact_completo.etag"
 
-# Exploración básica
-print(" INFORMACIÓN BÁSICA:")
-print(f"Filas: {len(df)}, Columnas: {len(df.columns)}")
-print(f"Rango de fechas: {df['date'].min()} to {df['date'].max()}")
-print(f"Países únicos: {df['country'].nunique()}")
+@lru_cache(maxsize=1)
+def descargar_datos() -> pd.DataFrame:
+    # Cache local en Parquet: solo se vuelve a descargar si cambia el ETag del CSV remoto
+    try:
+        respuesta = requests.head(URL, allow_redirects=True, timeout=30)
+        respuesta.raise_for_status()
+        version = respuesta.headers.get("ETag") or respuesta.headers.get("Last-Modified")
+    except requests.RequestException:
+        version = None
+    
+    version_cache = None
+    if os.path.exists(CACHE_PARQUET) and os.path.exists(CACHE_ETAG):
+        with open(CACHE_ETAG) as f:
+            version_cache = f.read().strip()
+    if os.path.exists(CACHE_PARQUET) and (version is None or version == version_cache):
+        return pd.read_parquet(CACHE_PARQUET)
+    
+    df = pd.read_csv(URL)
+    df.to_parquet(CACHE_PARQUET, compression="zstd", index=False)
+    if version is not None:
+        with open(CACHE_ETAG, "w") as f:
+            f.write(version)
+    return df
 
-# Verificar estructura
-print("\n COLUMNAS DISPONIBLES:")
-for i, col in enumerate(df.columns, 1):
-    print(f"{i:3d}. {col}")
+def main():
+    # Descargar datos
+    df = descargar_datos()
+    
+    # Exploración básica
+    print(" INFORMACIÓN BÁSICA:")
+    print(f"Filas: {len(df)}, Columnas: {len(df.columns)}")
+    print(f"Rango de fechas: {df['date'].min()} to {df['date'].max()}")
+    print(f"Países únicos: {df['country'].nunique()}")
 
-# Filtrar para Ecuador y Perú
-paises = ["Ecuador", "Peru"]
-df_filtrado = df[df['country'].isin(paises)]
+    # Verificar estructura
+    print("\n COLUMNAS DISPONIBLES:")
+    for i, col in enumerate(df.columns, 1):
+        print(f"{i:3d}. {col}")
 
-print(f"\n DATOS PARA {paises}:")
-print(f"Registros: {len(df_filtrado)}")
-print(f"Rango fechas: {df_filtrado['date'].min()} to {df_filtrado['date'].max()}")
+    # Filtrar para Ecuador y Perú
+    paises = ["Ecuador", "Peru"]
+    df_filtrado = df[df['country'].isin(paises)]
 
-# Verificar columnas críticas
-columnas_criticas = ['country', 'date', 'new_cases', 'people_vaccinated', 'population']
-for col in columnas_criticas:
-    exists = col in df.columns
-    print(f"{col}: {'✅' if exists else '❌'}")
+    print(f"\n DATOS PARA {paises}:")
+    print(f"Registros: {len(df_filtrado)}")
+    print(f"Rango fechas: {df_filtrado['date'].min()} to {df_filtrado['date'].max()}")
 
-# Crear tabla de perfilado manual
-perfilado = {
-    'metrica': [
-        'total_registros',
-        'total_paises',
-        'fecha_minima',
-        'fecha_maxima',
-        'columnas_totales',
-        'new_cases_presente',
-        'people_vaccinated_presente',
-        'population_presente'
-    ],
-    'valor': [
-        len(df),
-        df['country'].nunique(),
-        df['date'].min(),
-        df['date'].max(),
-        len(df.columns),
-        'new_cases' in df.columns,
-        'people_vaccinated' in df.columns,
-        'population' in df.columns
-    ],
-    'descripcion': [
-        'Total de registros en el dataset',
-        'Número de países únicos',
-        'Fecha más antigua en los datos',
-        'Fecha más reciente en los datos',
-        'Número total de columnas',
-        'Columna new_cases presente',
-        'Columna people_vaccinated presente',
-        'Columna population presente'
-    ]
-}
+    # Verificar columnas críticas
+    columnas_criticas = ['country', 'date', 'new_cases', 'people_vaccinated', 'population']
+    for col in columnas_criticas:
+        exists = col in df.columns
+        print(f"{col}: {'✅' if exists else '❌'}")
 
-df_perfilado = pd.DataFrame(perfilado)
-df_perfilado.to_csv('tabla_perfilado_manual.csv', index=False)
-print(" Tabla de perfilado manual guardada como 'tabla_perfilado_manual.csv'")
+    # Crear tabla de perfilado manual
+    perfilado = {
+        'metrica': [
+            'total_registros',
+            'total_paises',
+            'fecha_minima',
+            'fecha_maxima',
+            'columnas_totales',
+            'new_cases_presente',
+            'people_vaccinated_presente',
+            'population_presente'
+        ],
+        'valor': [
+            len(df),
+            df['country'].nunique(),
+            df['date'].min(),
+            df['date'].max(),
+            len(df.columns),
+            'new_cases' in df.columns,
+            'people_vaccinated' in df.columns,
+            'population' in df.columns
+        ],
+        'descripcion': [
+            'Total de registros en el dataset',
+            'Número de países únicos',
+            'Fecha más antigua en los datos',
+            'Fecha más reciente en los datos',
+            'Número total de columnas',
+            'Columna new_cases presente',
+            'Columna people_vaccinated presente',
+            'Columna population presente'
+        ]
+    }
 
-# Mostrar muestra de datos
-print("\n🔍 MUESTRA DE DATOS (Ecuador y Perú):")
-print(df_filtrado[['country', 'date', 'new_cases', 'people_vaccinated', 'population']].head(10))
\ No newline at end of file
+    df_perfilado = pd.DataFrame(perfilado)
+    df_perfilado.to_csv('tabla_perfilado_manual.csv', index=False)
+    print(" Tabla de perfilado manual guardada como 'tabla_perfilado_manual.csv'")
+
+    # Mostrar muestra de datos
+    print("\n🔍 MUESTRA DE DATOS (Ecuador y Perú):")
+    print(df_filtrado[['country', 'date', 'new_cases', 'people_vaccinated', 'population']].head(10))
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,140 @@
 # assets.py
 import pandas as pd
+import numpy as np
 import os
+import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
+from typing import Iterable
 from dagster import (
-    asset, AssetCheckResult, asset_check, AssetExecutionContext,
-    AssetCheckExecutionContext, AssetCheckSeverity, MetadataValue
+    asset, AssetCheckResult, multi_asset_check, AssetCheckSpec, AssetExecutionContext,
+    AssetCheckExecutionContext, AssetCheckSeverity, MetadataValue, Config
 )
 
 COVID_URL = "https://catalog.ourworldindata.org/garden/covid/latest/compact/compact.csv"
 PAISES_COMPARACION = ["Ecuador", "Peru"]
+COLUMNAS_DATOS = ['country', 'date', 'new_cases', 'people_vaccinated', 'population']
+TIPOS_DATOS = {'country': 'category', 'new_cases': 'float32', 'people_vaccinated': 'float64', 'population': 'float64'}
+# Subir al cambiar TIPOS_DATOS: invalida los compact.parquet escritos con los tipos anteriores
+FORMATO_CACHE = "v2"
 
-@asset
-def leer_datos(context: AssetExecutionContext) -> pd.DataFrame:
+def _version_remota() -> str | None:
+    # ETag (o Last-Modified) identifica la versión publicada del CSV; si el HEAD falla se descarga igual
     try:
-        df = pd.read_csv(COVID_URL)
-        context.log.info("Datos descargados desde URL")
+        respuesta = requests.head(COVID_URL, allow_redirects=True, timeout=30)
+        respuesta.raise_for_status()
+    except requests.RequestException:
+        return None
+    return respuesta.headers.get("ETag") or respuesta.headers.get("Last-Modified")
+
+def _clave_cache(version: str | None) -> str:
+    # El formato de cache forma parte de la clave: un cambio de tipos invalida caches viejos
+    return f"{FORMATO_CACHE}|{version or ''}"
+
+def _guardar_cache(context: AssetExecutionContext, df: pd.DataFrame, cache_path: str,
+                   etag_path: str, version: str | None) -> None:
+    # Best-effort: un error al escribir el cache nunca descarta los datos ya descargados
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        df.to_parquet(tmp_path, compression="zstd", index=False)
+        if os.path.exists(etag_path):
+            os.remove(etag_path)
+        os.replace(tmp_path, cache_path)
+        with open(etag_path, "w") as f:
+            f.write(_clave_cache(version))
     except Exception as e:
-        context.log.warning(f"No se pudo descargar: {e}")
+        context.log.warning(f"No se pudo guardar el cache local: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+class LeerDatosConfig(Config):
+    # Solo Ecuador y Perú se usan aguas abajo; False conserva todos los países
+    solo_paises_comparacion: bool = True
+
+@asset(io_manager_key="parquet_io_manager")
+def leer_datos(context: AssetExecutionContext, config: LeerDatosConfig) -> pd.DataFrame:
+    cache_path = os.path.join(os.getcwd(), "compact.parquet")
+    etag_path = os.path.join(os.getcwd(), "compact.etag")
+    # El cache guarda todos los países; el filtro se empuja a la lectura del Parquet
+    filtro_paises = [('country', 'in', PAISES_COMPARACION)] if config.solo_paises_comparacion else None
+    version = _version_remota()
+    version_cache = None
+    if os.path.exists(cache_path) and os.path.exists(etag_path):
+        with open(etag_path) as f:
+            version_cache = f.read().strip()
+    # Un cache escrito con otro formato (tipos anteriores) no se usa ni siquiera sin conexión
+    cache_valido = version_cache is not None and version_cache.startswith(_clave_cache(None))
+    df = None
+    if version is not None and version_cache == _clave_cache(version):
+        df = pd.read_parquet(cache_path, columns=COLUMNAS_DATOS, filters=filtro_paises)
+        context.log.info(f"Datos leídos desde cache local ({version})")
+    else:
+        try:
+            # Parseo en streaming (lector multihilo de pyarrow) mientras llega la respuesta HTTP
+            with requests.get(COVID_URL, stream=True, timeout=60) as respuesta:
+                respuesta.raise_for_status()
+                respuesta.raw.decode_content = True
+                df = pd.read_csv(respuesta.raw, usecols=COLUMNAS_DATOS, dtype=TIPOS_DATOS,
+                                 parse_dates=['date'], engine='pyarrow')
+        except Exception as e:
+            context.log.warning(f"No se pudo descargar: {e}")
+        else:
+            context.log.info("Datos descargados desde URL")
+            _guardar_cache(context, df, cache_path, etag_path, version)
+    if df is None:
         local_path = os.path.join(os.getcwd(), "compact.csv")
-        if os.path.exists(local_path):
-            df = pd.read_csv(local_path)
+        if cache_valido:
+            df = pd.read_parquet(cache_path, columns=COLUMNAS_DATOS, filters=filtro_paises)
+        elif os.path.exists(local_path):
+            df = pd.read_csv(local_path, usecols=lambda c: c in COLUMNAS_DATOS, dtype=TIPOS_DATOS)
         else:
             df = pd.DataFrame(columns=["country","date","population"])
     if "date" in df.columns:
         df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    if "country" in df.columns:
+        df["country"] = df["country"].astype("category")
+        if config.solo_paises_comparacion:
+            df = df[df["country"].isin(PAISES_COMPARACION)].reset_index(drop=True)
+    context.log.info(f"Datos leídos: {len(df)} filas")
     return df
 
+def _clave_country_date(df: pd.DataFrame) -> np.ndarray:
+    # Clave entera (código de país, día) para no hashear strings + Timestamps; las fechas son diarias
+    codigos = df['country'].astype('category').cat.codes.to_numpy().astype('uint64')
+    dias = df['date'].to_numpy().astype('datetime64[D]').view('int64').astype('uint64')
+    return (codigos << np.uint64(32)) | (dias & np.uint64(0xFFFFFFFF))
+
 @asset
 def limpiar_datos_para_checks(context: AssetExecutionContext, leer_datos: pd.DataFrame) -> pd.DataFrame:
-    df = leer_datos.copy()
-    
-    # Filtrar fechas futuras
-    if 'date' in df.columns:
-        df = df[df['date'] <= pd.Timestamp.today()]
+    df = leer_datos
     
     # Verificar y crear columnas faltantes si no existen
-    columnas_requeridas = ['country','date','population']
-    for col in columnas_requeridas:
+    valores_defecto = {'country': "Desconocido", 'date': pd.NaT, 'population': 1}
+    for col, valor in valores_defecto.items():
         if col not in df.columns:
-            df[col] = 1 if col=='population' else "Desconocido"
+            df[col] = valor
             context.log.warning(f"Columna {col} no existía, se creó con valores por defecto")
     
-    # Limpiar population: manejar valores nulos, vacíos, o <= 0
-    if 'population' in df.columns:
-        # Convertir a numérico, forzando errores a NaN
-        df['population'] = pd.to_numeric(df['population'], errors='coerce')
-        
-        # Contar problemas antes de limpiar
-        nulos_antes = df['population'].isna().sum()
-        negativos_antes = (df['population'] <= 0).sum()
-        
-        # Reemplazar valores problemáticos con 1 (valor mínimo válido)
-        df.loc[df['population'].isna() | (df['population'] <= 0), 'population'] = 1
-        
-        context.log.info(f"Population limpiado: {nulos_antes} nulos, {negativos_antes} <= 0 → reemplazados con 1")
+    # Filtrar fechas inválidas y futuras con una comparación int64 sobre datetime64
+    # (leer_datos ya convirtió date a datetime; NaT <= hoy es False)
+    hoy = np.datetime64(date.today(), 'ns')
+    df = df.loc[df['date'].to_numpy() <= hoy]
     
-    # Limpiar country y date
-    if 'country' in df.columns:
-        df['country'] = df['country'].fillna("Desconocido")
+    # Limpiar population: valores no numéricos, nulos o <= 0 se reemplazan con 1 (valor mínimo válido)
+    poblacion = pd.to_numeric(df['population'], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    nulos = np.isnan(poblacion)
+    no_positivos = poblacion <= 0
+    df['population'] = np.where(nulos | no_positivos, 1, poblacion)
+    context.log.info(f"Population limpiado: {nulos.sum()} nulos, {no_positivos.sum()} <= 0 → reemplazados con 1")
     
-    if 'date' in df.columns:
-        # Asegurar que date sea datetime
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
-        # Eliminar filas con fechas inválidas
-        df = df.dropna(subset=['date'])
+    # Limpiar country
+    if isinstance(df['country'].dtype, pd.CategoricalDtype) and "Desconocido" not in df['country'].cat.categories:
+        df['country'] = df['country'].cat.add_categories("Desconocido")
+    df['country'] = df['country'].fillna("Desconocido")
     
     # Eliminar duplicados DESPUÉS de limpiar los datos
     filas_antes = len(df)
-    df = df.drop_duplicates(subset=['country','date'], keep='last')
+    df = df.loc[~pd.Series(_clave_country_date(df)).duplicated(keep='last').to_numpy()]
     duplicados_eliminados = filas_antes - len(df)
     
     if duplicados_eliminados > 0:
@@ -75,107 +142,133 @@ def limpiar_datos_para_checks(context: AssetExecutionContext, leer_datos: pd.Dat
     
     context.log.info(f"Datos limpiados: {len(df)} filas finales, {len(df.columns)} columnas")
     
-    # Log de valores únicos de population para debug
-    pop_stats = df['population'].describe()
-    context.log.info(f"Population stats: min={pop_stats['min']}, max={pop_stats['max']}, mean={pop_stats['mean']:.0f}")
+    # Log de valores únicos de population para debug (reducciones directas, sin los cuantiles de describe)
+    poblacion = df['population'].to_numpy()
+    if poblacion.size:
+        context.log.info(f"Population stats: min={poblacion.min()}, max={poblacion.max()}, mean={poblacion.mean():.0f}")
     
     return df
 
 # ------------------ CHECKS CORREGIDOS ------------------
 
-@asset_check(asset=limpiar_datos_para_checks, name="check_fechas_futuras")
-def check_fechas_futuras(context: AssetCheckExecutionContext, limpiar_datos_para_checks: pd.DataFrame) -> AssetCheckResult:
-    if 'date' not in limpiar_datos_para_checks.columns:
+def _estadisticas_calidad(df: pd.DataFrame) -> dict:
+    # Recorre cada columna una sola vez; los checks solo comparan escalares
+    estadisticas = {"columnas": set(df.columns), "total_filas": len(df)}
+    
+    if 'date' in df.columns:
+        fechas = df['date'].to_numpy()
+        estadisticas["max_date"] = fechas.max().astype('datetime64[D]') if fechas.size else None
+    
+    if 'country' in df.columns and 'date' in df.columns:
+        conteos = pd.Series(_clave_country_date(df)).value_counts()
+        estadisticas["filas_unicas"] = len(conteos)
+        estadisticas["filas_duplicadas"] = int(conteos[conteos > 1].sum())
+    
+    if 'population' in df.columns:
+        # limpiar_datos_para_checks ya forzó population a numérico: una sola pasada en NumPy
+        poblacion = df['population'].to_numpy(dtype='float64', na_value=np.nan)
+        es_nulo = np.isnan(poblacion)
+        validos = poblacion[~es_nulo]
+        estadisticas.update({
+            "population_nulos": int(es_nulo.sum()),
+            "population_zero": int((poblacion == 0).sum()),
+            "population_negativos": int((poblacion < 0).sum()),
+            "population_min": float(validos.min()) if validos.size else 0.0,
+            "population_max": float(validos.max()) if validos.size else 0.0
+        })
+    
+    if 'new_cases' in df.columns:
+        new_cases_numeric = pd.to_numeric(df['new_cases'], errors='coerce')
+        negativos = new_cases_numeric < 0
+        estadisticas.update({
+            "new_cases_negativos": int(negativos.sum()),
+            "new_cases_nulos": int(new_cases_numeric.isna().sum()),
+            # Algunos ejemplos de valores negativos para documentación
+            "new_cases_ejemplos": df.loc[negativos, ['country', 'date', 'new_cases']].head(3).to_string(index=False)
+        })
+    
+    return estadisticas
+
+def check_fechas_futuras(estadisticas: dict) -> AssetCheckResult:
+    if 'max_date' not in estadisticas:
         return AssetCheckResult(
+            check_name="check_fechas_futuras",
             passed=False, 
             description="Columna date no existe", 
             severity=AssetCheckSeverity.ERROR
         )
-    max_date = limpiar_datos_para_checks['date'].max().date()
-    passed = max_date <= date.today()
+    max_date = estadisticas["max_date"]
+    passed = bool(max_date is None or max_date <= np.datetime64(date.today()))
     return AssetCheckResult(
+        check_name="check_fechas_futuras",
         passed=passed,
         description=f"Fecha máxima: {max_date}" if passed else f"ERROR: Fecha futura {max_date}",
         severity=AssetCheckSeverity.WARN if passed else AssetCheckSeverity.ERROR,
         metadata={"fecha_maxima": MetadataValue.text(str(max_date))}
     )
 
-@asset_check(asset=limpiar_datos_para_checks, name="check_columnas_clave")
-def check_columnas_clave(context: AssetCheckExecutionContext, limpiar_datos_para_checks: pd.DataFrame) -> AssetCheckResult:
+def check_columnas_clave(estadisticas: dict) -> AssetCheckResult:
     columnas = ['country','date','population']
-    faltantes = [c for c in columnas if c not in limpiar_datos_para_checks.columns]
+    faltantes = [c for c in columnas if c not in estadisticas["columnas"]]
     passed = len(faltantes) == 0
     return AssetCheckResult(
+        check_name="check_columnas_clave",
         passed=passed,
         description="Todas columnas presentes" if passed else f"Faltan columnas: {faltantes}",
         severity=AssetCheckSeverity.WARN if passed else AssetCheckSeverity.ERROR,
         metadata={
             "columnas_faltantes": MetadataValue.json(faltantes),
-            "columnas_presentes": MetadataValue.json([c for c in columnas if c in limpiar_datos_para_checks.columns])
+            "columnas_presentes": MetadataValue.json([c for c in columnas if c in estadisticas["columnas"]])
         }
     )
 
-@asset_check(asset=limpiar_datos_para_checks, name="check_unicidad_country_date")
-def check_unicidad_country_date(context: AssetCheckExecutionContext, limpiar_datos_para_checks: pd.DataFrame) -> AssetCheckResult:
+def check_unicidad_country_date(estadisticas: dict) -> AssetCheckResult:
     # Verificar que existan las columnas necesarias
-    if 'country' not in limpiar_datos_para_checks.columns or 'date' not in limpiar_datos_para_checks.columns:
+    if 'filas_duplicadas' not in estadisticas:
         return AssetCheckResult(
+            check_name="check_unicidad_country_date",
             passed=False,
             description="Faltan columnas 'country' o 'date' para verificar unicidad",
             severity=AssetCheckSeverity.ERROR
         )
     
-    # Contar duplicados antes de eliminarlos
-    total_filas = len(limpiar_datos_para_checks)
-    duplicados = limpiar_datos_para_checks.duplicated(subset=['country','date'], keep=False)
-    num_duplicados = int(duplicados.sum())  # Convertir a int de Python
-    filas_unicas = len(limpiar_datos_para_checks.drop_duplicates(subset=['country','date']))
-    
-    passed = bool(num_duplicados == 0)  # Convertir a bool de Python
+    num_duplicados = estadisticas["filas_duplicadas"]
+    filas_unicas = estadisticas["filas_unicas"]
+    passed = num_duplicados == 0
     
     return AssetCheckResult(
+        check_name="check_unicidad_country_date",
         passed=passed,
         description=f"Sin duplicados: {filas_unicas} filas únicas" if passed else f"{num_duplicados} duplicados encontrados (filas únicas: {filas_unicas})",
         severity=AssetCheckSeverity.WARN if passed else AssetCheckSeverity.ERROR,
         metadata={
-            "total_filas": MetadataValue.int(total_filas),
-            "filas_duplicadas": MetadataValue.int(int(num_duplicados)),
+            "total_filas": MetadataValue.int(estadisticas["total_filas"]),
+            "filas_duplicadas": MetadataValue.int(num_duplicados),
             "filas_unicas": MetadataValue.int(filas_unicas)
         }
     )
 
-@asset_check(asset=limpiar_datos_para_checks, name="check_population_positiva")
-def check_population_positiva(context: AssetCheckExecutionContext, limpiar_datos_para_checks: pd.DataFrame) -> AssetCheckResult:
-    if 'population' not in limpiar_datos_para_checks.columns:
+def check_population_positiva(estadisticas: dict) -> AssetCheckResult:
+    if 'population_nulos' not in estadisticas:
         return AssetCheckResult(
+            check_name="check_population_positiva",
             passed=False, 
             description="Columna population ausente", 
             severity=AssetCheckSeverity.ERROR
         )
     
     # Ya debería estar limpio, pero verificamos
-    population_col = limpiar_datos_para_checks['population']
-    
-    # Contar diferentes tipos de problemas
-    valores_nulos = int(population_col.isna().sum())  # Convertir a int de Python
-    valores_zero = int((population_col == 0).sum())
-    valores_negativos = int((population_col < 0).sum())
-    valores_no_numericos = 0
-    
-    # Verificar si hay valores no numéricos
-    try:
-        numeric_pop = pd.to_numeric(population_col, errors='coerce')
-        valores_no_numericos = numeric_pop.isna().sum() - valores_nulos
-    except:
-        valores_no_numericos = len(population_col)
+    valores_nulos = estadisticas["population_nulos"]
+    valores_zero = estadisticas["population_zero"]
+    valores_negativos = estadisticas["population_negativos"]
+    min_pop = estadisticas["population_min"]
+    max_pop = estadisticas["population_max"]
     
-    total_problemas = valores_nulos + valores_zero + valores_negativos + valores_no_numericos
-    passed = bool(total_problemas == 0)  # Convertir a bool de Python
+    total_problemas = valores_nulos + valores_zero + valores_negativos
+    passed = total_problemas == 0
     
     # Construir descripción detallada
     if passed:
-        min_pop = population_col.min()
-        max_pop = population_col.max()
         description = f"✓ Todas las poblaciones son positivas (min: {min_pop:,.0f}, max: {max_pop:,.0f})"
     else:
         problemas = []
@@ -185,78 +278,97 @@ def check_population_positiva(context: AssetCheckExecutionContext, limpiar_datos
             problemas.append(f"{valores_zero} zeros")
         if valores_negativos > 0:
             problemas.append(f"{valores_negativos} negativos")
-        if valores_no_numericos > 0:
-            problemas.append(f"{valores_no_numericos} no numéricos")
         description = f"✗ Problemas encontrados: {', '.join(problemas)}"
     
     return AssetCheckResult(
+        check_name="check_population_positiva",
         passed=passed,
         description=description,
         severity=AssetCheckSeverity.WARN if passed else AssetCheckSeverity.ERROR,
         metadata={
-            "valores_nulos": MetadataValue.int(int(valores_nulos)),
-            "valores_zero": MetadataValue.int(int(valores_zero)),
-            "valores_negativos": MetadataValue.int(int(valores_negativos)),
-            "valores_no_numericos": MetadataValue.int(int(valores_no_numericos)),
-            "total_filas": MetadataValue.int(len(limpiar_datos_para_checks)),
-            "min_population": MetadataValue.float(float(population_col.min()) if not population_col.empty else 0),
-            "max_population": MetadataValue.float(float(population_col.max()) if not population_col.empty else 0)
+            "valores_nulos": MetadataValue.int(valores_nulos),
+            "valores_zero": MetadataValue.int(valores_zero),
+            "valores_negativos": MetadataValue.int(valores_negativos),
+            "total_filas": MetadataValue.int(estadisticas["total_filas"]),
+            "min_population": MetadataValue.float(min_pop),
+            "max_population": MetadataValue.float(max_pop)
         }
     )
 
-@asset_check(asset=limpiar_datos_para_checks, name="check_new_cases_no_negativos")
-def check_new_cases_no_negativos(context: AssetCheckExecutionContext, limpiar_datos_para_checks: pd.DataFrame) -> AssetCheckResult:
-    if 'new_cases' not in limpiar_datos_para_checks.columns:
+def check_new_cases_no_negativos(estadisticas: dict) -> AssetCheckResult:
+    if 'new_cases_negativos' not in estadisticas:
         return AssetCheckResult(
+            check_name="check_new_cases_no_negativos",
             passed=True,  # Si no existe la columna, el check pasa
             description="Columna 'new_cases' no existe - check omitido",
             severity=AssetCheckSeverity.WARN
         )
     
-    # Convertir a numérico y contar valores negativos
-    new_cases_numeric = pd.to_numeric(limpiar_datos_para_checks['new_cases'], errors='coerce')
-    valores_negativos = int((new_cases_numeric < 0).sum())  # Convertir a int de Python
-    valores_nulos = int(new_cases_numeric.isna().sum())
-    
-    passed = bool(valores_negativos == 0)  # Convertir a bool de Python
+    valores_negativos = estadisticas["new_cases_negativos"]
+    valores_nulos = estadisticas["new_cases_nulos"]
+    total_filas = estadisticas["total_filas"]
+    passed = valores_negativos == 0
     
     # Documentar si hay valores negativos
     description = "Todos los new_cases son ≥ 0"
     if valores_negativos > 0:
-        # Obtener algunos ejemplos de valores negativos para documentación
-        ejemplos_negativos = limpiar_datos_para_checks[new_cases_numeric < 0][['country', 'date', 'new_cases']].head(3)
-        description = f"DOCUMENTADO: {valores_negativos} valores negativos encontrados. Ejemplos: {ejemplos_negativos.to_string(index=False)}"
+        description = f"DOCUMENTADO: {valores_negativos} valores negativos encontrados. Ejemplos: {estadisticas['new_cases_ejemplos']}"
     
     if valores_nulos > 0:
         description += f" | {valores_nulos} valores nulos"
     
     return AssetCheckResult(
+        check_name="check_new_cases_no_negativos",
         passed=passed,
         description=description,
         severity=AssetCheckSeverity.WARN,  # WARN porque permitimos negativos si están documentados
         metadata={
-            "valores_negativos": MetadataValue.int(int(valores_negativos)),
-            "valores_nulos": MetadataValue.int(int(valores_nulos)),
-            "total_filas": MetadataValue.int(len(limpiar_datos_para_checks)),
-            "porcentaje_negativos": MetadataValue.float(float(valores_negativos / len(limpiar_datos_para_checks) * 100))
+            "valores_negativos": MetadataValue.int(valores_negativos),
+            "valores_nulos": MetadataValue.int(valores_nulos),
+            "total_filas": MetadataValue.int(total_filas),
+            "porcentaje_negativos": MetadataValue.float(float(valores_negativos / total_filas * 100))
         }
     )
 
+CHECKS_CALIDAD = [
+    check_fechas_futuras,
+    check_columnas_clave,
+    check_unicidad_country_date,
+    check_population_positiva,
+    check_new_cases_no_negativos
+]
+
+@multi_asset_check(
+    specs=[AssetCheckSpec(name=check.__name__, asset=limpiar_datos_para_checks) for check in CHECKS_CALIDAD]
+)
+def checks_calidad_datos(context: AssetCheckExecutionContext, limpiar_datos_para_checks: pd.DataFrame) -> Iterable[AssetCheckResult]:
+    estadisticas = _estadisticas_calidad(limpiar_datos_para_checks)
+    for check in CHECKS_CALIDAD:
+        yield check(estadisticas)
+
 # ------------------ ASSETS PROCESADOS ------------------
 
 @asset
 def datos_procesados(context: AssetExecutionContext, leer_datos: pd.DataFrame) -> pd.DataFrame:
     context.log.info(f"Procesando datos para: {PAISES_COMPARACION}")
-    df_filtrado = leer_datos[leer_datos['country'].isin(PAISES_COMPARACION)].copy()
+    df_filtrado = leer_datos[leer_datos['country'].isin(PAISES_COMPARACION)]
     columnas_posibles = ['country', 'date', 'new_cases', 'people_vaccinated', 'population']
     columnas_existentes = [col for col in columnas_posibles if col in df_filtrado.columns]
-    df_procesado = df_filtrado[columnas_existentes].copy()
+    df_procesado = df_filtrado[columnas_existentes]
     columnas_limpiar = [col for col in ['new_cases', 'people_vaccinated'] if col in df_procesado.columns]
     if columnas_limpiar:
         df_procesado = df_procesado.dropna(subset=columnas_limpiar)
+        # new_cases en float32 para rolling/groupby (valores diarios, muy por debajo de 2**24);
+        # people_vaccinated queda en float64: float32 redondearía acumulados de decenas de millones
+        if 'new_cases' in columnas_limpiar:
+            df_procesado = df_procesado.astype({'new_cases': 'float32'})
     if 'country' in df_procesado.columns:
         df_procesado = df_procesado.rename(columns={'country': 'location'})
-    df_procesado = df_procesado.sort_values(['location', 'date'])
+        location = df_procesado['location'].astype('category').cat.remove_unused_categories()
+        df_procesado['location'] = location.cat.reorder_categories(sorted(location.cat.categories))
+    # Ordenar por (location, date) sobre los códigos enteros de la categoría; lexsort es estable
+    orden = np.lexsort((df_procesado['date'].to_numpy(), df_procesado['location'].cat.codes.to_numpy()))
+    df_procesado = df_procesado.iloc[orden]
     context.add_output_metadata({
         "registros_procesados": MetadataValue.int(len(df_procesado)),
         "columnas_finales": MetadataValue.json(list(df_procesado.columns)),
@@ -266,48 +378,65 @@ def datos_procesados(context: AssetExecutionContext, leer_datos: pd.DataFrame) -
 
 @asset
 def metrica_incidencia_7d(context: AssetExecutionContext, datos_procesados: pd.DataFrame) -> pd.DataFrame:
-    resultados = []
-    for pais in PAISES_COMPARACION:
-        df_pais = datos_procesados[datos_procesados['location'] == pais].copy()
-        if len(df_pais) > 0 and 'new_cases' in df_pais.columns and 'population' in df_pais.columns:
-            df_pais['incidencia_diaria'] = (df_pais['new_cases'] / df_pais['population']) * 100000
-            df_pais['incidencia_7d'] = df_pais['incidencia_diaria'].rolling(7, min_periods=1).mean()
-            resultado = df_pais[['date', 'location', 'incidencia_7d']].copy()
-            resultado.columns = ['fecha', 'pais', 'incidencia_7d']
-            resultados.append(resultado)
-    return pd.concat(resultados, ignore_index=True) if resultados else pd.DataFrame(columns=['fecha', 'pais', 'incidencia_7d'])
+    columnas = ['fecha', 'pais', 'incidencia_7d']
+    if datos_procesados.empty or 'new_cases' not in datos_procesados.columns or 'population' not in datos_procesados.columns:
+        return pd.DataFrame(columns=columnas)
+    df = datos_procesados
+    incidencia_diaria = pd.Series(df['new_cases'].to_numpy() / df['population'].to_numpy() * 100000, index=df.index)
+    # El rolling devuelve (location, índice original): se quita el nivel del grupo y se
+    # realinea por índice, sin depender del orden de filas de datos_procesados
+    incidencia_7d = (incidencia_diaria.groupby(df['location'], sort=False, observed=True)
+                     .rolling(7, min_periods=1).mean()
+                     .droplevel(0).reindex(df.index))
+    resultado = pd.DataFrame({'fecha': df['date'], 'pais': df['location'], 'incidencia_7d': incidencia_7d})
+    return resultado.reset_index(drop=True)
 
 @asset
 def metrica_factor_crec_7d(context: AssetExecutionContext, datos_procesados: pd.DataFrame) -> pd.DataFrame:
-    resultados = []
-    for pais in PAISES_COMPARACION:
-        df_pais = datos_procesados[datos_procesados['location'] == pais].copy()
-        df_pais = df_pais.sort_values('date')
-        if len(df_pais) >= 14 and 'new_cases' in df_pais.columns:
-            df_pais['casos_semana_actual'] = df_pais['new_cases'].rolling(7).sum()
-            df_pais['casos_semana_prev'] = df_pais['casos_semana_actual'].shift(7)
-            df_pais = df_pais.dropna(subset=['casos_semana_actual', 'casos_semana_prev'])
-            df_pais = df_pais[df_pais['casos_semana_prev'] > 0]  # Evitar división por cero
-            df_pais['factor_crec_7d'] = df_pais['casos_semana_actual'] / df_pais['casos_semana_prev']
-            df_pais = df_pais[df_pais['factor_crec_7d'].notna()]
-            if len(df_pais) > 0:
-                resultado = df_pais[['date', 'location', 'casos_semana_actual', 'factor_crec_7d']].copy()
-                resultado.columns = ['semana_fin', 'pais', 'casos_semana', 'factor_crec_7d']
-                resultados.append(resultado)
-    return pd.concat(resultados, ignore_index=True) if resultados else pd.DataFrame(columns=['semana_fin', 'pais', 'casos_semana', 'factor_crec_7d'])
+    columnas = ['semana_fin', 'pais', 'casos_semana', 'factor_crec_7d']
+    if datos_procesados.empty or 'new_cases' not in datos_procesados.columns:
+        return pd.DataFrame(columns=columnas)
+    df = datos_procesados
+    grupos = df.groupby('location', sort=False, observed=True)['new_cases']
+    casos_semana_actual = grupos.rolling(7).sum().droplevel(0).reindex(df.index)
+    casos_semana_prev = casos_semana_actual.groupby(df['location'], sort=False, observed=True).shift(7)
+    actual = casos_semana_actual.to_numpy()
+    prev = casos_semana_prev.to_numpy()
+    # Evitar división por cero: sin semana previa > 0 el factor queda en NaN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = np.where(prev > 0, actual / prev, np.nan)
+    # Se requieren al menos dos semanas por país
+    validos = (grupos.transform('size').to_numpy() >= 14) & ~np.isnan(factor)
+    df = df.assign(casos_semana_actual=actual, factor_crec_7d=factor).loc[validos]
+    resultado = df[['date', 'location', 'casos_semana_actual', 'factor_crec_7d']]
+    resultado.columns = columnas
+    return resultado.reset_index(drop=True)
 
 @asset
 def reporte_excel_covid(context: AssetExecutionContext, datos_procesados: pd.DataFrame, 
                         metrica_incidencia_7d: pd.DataFrame, metrica_factor_crec_7d: pd.DataFrame) -> str:
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     archivo = f"reporte_covid_{timestamp}.xlsx"
-    with pd.ExcelWriter(archivo, engine='openpyxl') as writer:
-        datos_procesados.to_excel(writer, sheet_name='Datos_Procesados', index=False)
-        metrica_incidencia_7d.to_excel(writer, sheet_name='Incidencia_7d', index=False)
-        metrica_factor_crec_7d.to_excel(writer, sheet_name='Factor_Crecimiento', index=False)
-    context.log.info(f"Reporte exportado: {archivo}")
+    archivo_detalle = f"datos_procesados_{timestamp}.parquet"
+    
+    def escribir_excel():
+        with pd.ExcelWriter(archivo, engine='xlsxwriter', datetime_format='yyyy-mm-dd', date_format='yyyy-mm-dd') as writer:
+            metrica_incidencia_7d.to_excel(writer, sheet_name='Incidencia_7d', index=False)
+            metrica_factor_crec_7d.to_excel(writer, sheet_name='Factor_Crecimiento', index=False)
+    
+    # Detalle en Parquet y resumen en Excel son archivos independientes: se escriben en paralelo
+    # (pyarrow libera el GIL mientras xlsxwriter genera el XML)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futuros = [
+            executor.submit(datos_procesados.to_parquet, archivo_detalle, compression="zstd", index=False),
+            executor.submit(escribir_excel)
+        ]
+        for futuro in futuros:
+            futuro.result()
+    context.log.info(f"Reporte exportado: {archivo} (detalle: {archivo_detalle})")
     context.add_output_metadata({
         "archivo_generado": MetadataValue.text(archivo),
+        "archivo_detalle": MetadataValue.path(archivo_detalle),
         "registros_datos_procesados": MetadataValue.int(len(datos_procesados)),
         "registros_incidencia": MetadataValue.int(len(metrica_incidencia_7d)),
         "registros_factor_crec": MetadataValue.int(len(metrica_factor_crec_7d))
@@ -1,74 +1,212 @@
 
 # script para visualizar la estructura de los datos a usar
 
-import pandas as pd
+import argparse
+import csv
+import hashlib
+import io
+import itertools
+import json
+import os
+import re
 import requests
+from functools import lru_cache
 
-def inspeccionar_dataset():
-    """Inspecciona la estructura real del dataset COVID-19"""
+COVID_URL = "https://catalog.ourworldindata.org/garden/covid/latest/compact/compact.csv"
+BYTES_ENCABEZADO = 32768
+FILAS_MUESTRA = 5
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "covid_pipeline")
+# Columnas conocidas del dataset OWID, incluidas en el paquete para funcionar sin red
+SNAPSHOT_COLUMNAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "columns_snapshot.json")
+
+KW_PAIS = frozenset(('country', 'location', 'nation', 'region'))
+KW_FECHA = frozenset(('date', 'time', 'day'))
+KW_CASOS = frozenset(('cases', 'new_cases', 'daily_cases'))
+KW_VACUNAS = frozenset(('vaccin', 'vacc', 'immuniz'))
+PALABRAS_POR_CATEGORIA = {'pais': KW_PAIS, 'fecha': KW_FECHA, 'casos': KW_CASOS, 'vacunas': KW_VACUNAS}
+CATEGORIAS = tuple(PALABRAS_POR_CATEGORIA)
+
+# Textos del reporte por categoría: (categoría, título, etiqueta, mensaje si no hay columnas)
+SECCIONES_REPORTE = (
+    ('pais', "🌍 BUSCANDO COLUMNAS DE PAÍS/UBICACIÓN:", "país", "No se encontraron columnas obvias de país"),
+    ('fecha', "📅 BUSCANDO COLUMNAS DE FECHA:", "fecha", "No se encontraron columnas obvias de fecha"),
+    ('casos', "🦠 BUSCANDO COLUMNAS DE CASOS:", "casos", "No se encontraron columnas obvias de casos"),
+    ('vacunas', "💉 BUSCANDO COLUMNAS DE VACUNACIÓN:", "vacunas", "No se encontraron columnas obvias de vacunación"),
+)
+
+# Una sola alternancia compilada al importar el módulo, con un grupo con nombre por categoría.
+# Se buscan subcadenas y no tokens exactos: 'vaccin' debe encontrar 'people_vaccinated';
+# el lookahead permite coincidencias solapadas ('vaccination' contiene 'vaccin' y 'nation')
+# e IGNORECASE evita crear una copia en minúsculas de cada columna
+PATRON_PALABRAS = re.compile(
+    "(?=(?:" + "|".join(
+        f"(?P<{categoria}>" + "|".join(map(re.escape, sorted(palabras, key=lambda p: (-len(p), p)))) + ")"
+        for categoria, palabras in PALABRAS_POR_CATEGORIA.items()
+    ) + "))",
+    re.IGNORECASE,
+)
+
+def _clasificar_columnas(columnas):
+    """Asigna cada columna a todas las categorías cuyas palabras clave contiene"""
+    columnas_por_categoria = {categoria: [] for categoria in CATEGORIAS}
+    for col in columnas:
+        # Un solo escaneo del regex por columna; varias palabras de la misma categoría no duplican
+        categorias = {m.lastgroup for m in PATRON_PALABRAS.finditer(col)}
+        for categoria in categorias:
+            columnas_por_categoria[categoria].append(col)
+    return columnas_por_categoria
+
+def _descargar_encabezado(url):
+    """Descarga solo el inicio del CSV (cabecera y primeras filas) con un HTTP Range"""
+    respuesta = requests.get(url, headers={"Range": f"bytes=0-{BYTES_ENCABEZADO - 1}"}, stream=True, timeout=30)
+    if respuesta.status_code == 416:
+        # Rango no aceptado: GET normal, igualmente se lee solo el primer bloque
+        respuesta.close()
+        respuesta = requests.get(url, stream=True, timeout=30)
+    # Cerrar la conexión apenas llega el primer bloque: si el servidor ignora el rango
+    # se corta la transferencia en vez de dejar que siga drenando el cuerpo
+    with respuesta:
+        respuesta.raise_for_status()
+        bloque = next(respuesta.iter_content(chunk_size=BYTES_ENCABEZADO), b"")
+    return bloque[:bloque.rfind(b"\n") + 1]  # descartar la última línea incompleta
+
+def _formatear_muestra(cabecera, filas):
+    """Tabla de texto con las filas de muestra; con muchas columnas solo se ven los extremos"""
+    indices = list(range(len(cabecera)))
+    if len(indices) > 4:
+        indices = indices[:2] + [None] + indices[-2:]
+    tabla = [[""] + [cabecera[i] if i is not None else "..." for i in indices]]
+    for n, fila in enumerate(filas):
+        tabla.append([str(n)] + [fila[i] if i is not None and i < len(fila) else "..." for i in indices])
+    anchos = [max(len(fila[j]) for fila in tabla) for j in range(len(tabla[0]))]
+    lineas = ["  ".join(valor.rjust(ancho) for valor, ancho in zip(fila, anchos)) for fila in tabla]
+    lineas.append(f"\n[{len(filas)} rows x {len(cabecera)} columns]")
+    return "\n".join(lineas)
+
+def _leer_encabezado(url):
+    """Devuelve el inicio del CSV desde el cache local si la versión remota (ETag) no cambió"""
+    try:
+        with requests.head(url, allow_redirects=True, timeout=30) as cabecera:
+            cabecera.raise_for_status()
+            version = cabecera.headers.get("ETag") or cabecera.headers.get("Last-Modified")
+    except requests.RequestException:
+        version = None  # sin HEAD se descarga igual, sin usar el cache
+    ruta = None
+    if version:
+        nombre = f"{hashlib.sha1(url.encode()).hexdigest()}.{hashlib.sha1(version.encode()).hexdigest()[:16]}.csv.head"
+        ruta = os.path.join(CACHE_DIR, nombre)
+        if os.path.exists(ruta):
+            with open(ruta, "rb") as f:
+                return f.read()
+    bloque = _descargar_encabezado(url)
+    if ruta:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(ruta, "wb") as f:
+            f.write(bloque)
+    return bloque
+
+@lru_cache(maxsize=4)
+def _leer_muestra(url):
+    """Cabecera y filas de muestra del CSV; se memoriza por URL (los errores no quedan en cache)"""
+    # Leer solo la cabecera y las primeras 5 filas con el módulo csv, sin pandas;
+    # el texto se decodifica por bloques a medida que el lector avanza, no el inicio completo
+    bloque = io.BytesIO(_leer_encabezado(url))
+    lector = csv.reader(io.TextIOWrapper(bloque, encoding="utf-8", newline=""))
+    cabecera = tuple(next(lector))
+    muestra = tuple(tuple(fila) for fila in itertools.islice(lector, FILAS_MUESTRA))
+    _guardar_snapshot(url, cabecera)
+    return cabecera, muestra
+
+def _ruta_snapshot(url):
+    return os.path.join(CACHE_DIR, f"{hashlib.sha1(url.encode()).hexdigest()}.columns.json")
+
+def _guardar_snapshot(url, cabecera):
+    """Guarda la última lista de columnas leída con éxito para usarla sin conexión"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_ruta_snapshot(url), "w", encoding="utf-8") as f:
+            json.dump(list(cabecera), f)
+    except OSError:
+        pass  # el snapshot es solo un respaldo
+
+def _columnas_snapshot(url):
+    """Columnas de respaldo: último snapshot local de la URL o, para OWID, el incluido en el paquete"""
+    rutas = [_ruta_snapshot(url)]
+    if url == COVID_URL:
+        rutas.append(SNAPSHOT_COLUMNAS)
+    for ruta in rutas:
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            continue
+    return None
+
+def leer_columnas(url=COVID_URL):
+    """Nombres de columna del CSV, sin armar ni imprimir el reporte; sin red usa el snapshot"""
+    try:
+        return list(_leer_muestra(url)[0])
+    except OSError:  # incluye los errores de requests (DNS, TLS, HTTP 5xx)
+        columnas = _columnas_snapshot(url)
+        if columnas is None:
+            raise
+        return columnas
+
+def _reporte(cabecera, muestra):
+    """Líneas del reporte legible a partir de la cabecera y las filas de muestra"""
+    lineas = [f"\n📊 INFORMACIÓN BÁSICA:",
+              f"   - Filas de muestra: {len(muestra)}",
+              f"   - Total de columnas: {len(cabecera)}"]
     
-    url = "https://catalog.ourworldindata.org/garden/covid/latest/compact/compact.csv"
+    lineas.append(f"\n📋 COLUMNAS DISPONIBLES:")
+    lineas.extend(f"   {i+1:2d}. {col}" for i, col in enumerate(cabecera))
     
-    print("=== INSPECCIONANDO DATASET COVID-19 ===")
-    print(f"URL: {url}")
+    lineas.append(f"\n🔍 DATOS DE MUESTRA:")
+    lineas.append(_formatear_muestra(cabecera, muestra))
     
-    try:
-        # Leer solo las primeras 5 filas para inspeccionar
-        df = pd.read_csv(url, nrows=5)
-        
-        print(f"\n📊 INFORMACIÓN BÁSICA:")
-        print(f"   - Filas de muestra: {len(df)}")
-        print(f"   - Total de columnas: {len(df.columns)}")
-        
-        print(f"\n📋 COLUMNAS DISPONIBLES:")
-        for i, col in enumerate(df.columns):
-            print(f"   {i+1:2d}. {col}")
-        
-        print(f"\n🔍 DATOS DE MUESTRA:")
-        print(df.head())
-        
-        print(f"\n🌍 BUSCANDO COLUMNAS DE PAÍS/UBICACIÓN:")
-        columnas_pais = [col for col in df.columns if any(keyword in col.lower() 
-                        for keyword in ['country', 'location', 'nation', 'region'])]
-        if columnas_pais:
-            print(f"   Posibles columnas de país: {columnas_pais}")
-        else:
-            print("   No se encontraron columnas obvias de país")
-        
-        print(f"\n📅 BUSCANDO COLUMNAS DE FECHA:")
-        columnas_fecha = [col for col in df.columns if any(keyword in col.lower() 
-                         for keyword in ['date', 'time', 'day'])]
-        if columnas_fecha:
-            print(f"   Posibles columnas de fecha: {columnas_fecha}")
-        else:
-            print("   No se encontraron columnas obvias de fecha")
-        
-        print(f"\n🦠 BUSCANDO COLUMNAS DE CASOS:")
-        columnas_casos = [col for col in df.columns if any(keyword in col.lower() 
-                         for keyword in ['cases', 'new_cases', 'daily_cases'])]
-        if columnas_casos:
-            print(f"   Posibles columnas de casos: {columnas_casos}")
-        else:
-            print("   No se encontraron columnas obvias de casos")
-        
-        print(f"\n💉 BUSCANDO COLUMNAS DE VACUNACIÓN:")
-        columnas_vacunas = [col for col in df.columns if any(keyword in col.lower() 
-                           for keyword in ['vaccin', 'vacc', 'immuniz'])]
-        if columnas_vacunas:
-            print(f"   Posibles columnas de vacunas: {columnas_vacunas}")
+    columnas_por_categoria = _clasificar_columnas(cabecera)
+    
+    for categoria, titulo, etiqueta, sin_columnas in SECCIONES_REPORTE:
+        lineas.append(f"\n{titulo}")
+        columnas = columnas_por_categoria[categoria]
+        if columnas:
+            lineas.append(f"   Posibles columnas de {etiqueta}: {columnas}")
         else:
-            print("   No se encontraron columnas obvias de vacunación")
-        
-        # Verificar si hay una columna que parezca ser el identificador de país
-        primera_columna_data = df.iloc[:, 0].head()
-        print(f"\n🔎 PRIMERA COLUMNA (posible país): '{df.columns[0]}'")
-        print(f"   Valores de muestra: {list(primera_columna_data)}")
-        
-        return df.columns.tolist()
+            lineas.append(f"   {sin_columnas}")
+    
+    # Verificar si hay una columna que parezca ser el identificador de país
+    primera_columna_data = [fila[0] for fila in muestra if fila]
+    lineas.append(f"\n🔎 PRIMERA COLUMNA (posible país): '{cabecera[0]}'")
+    lineas.append(f"   Valores de muestra: {primera_columna_data}")
+    return lineas
+
+def inspeccionar_dataset(url=COVID_URL):
+    """Inspecciona la estructura real del dataset COVID-19"""
+    
+    # El reporte se acumula en una lista y se escribe de una vez al final
+    salida = ["=== INSPECCIONANDO DATASET COVID-19 ===", f"URL: {url}"]
+    
+    try:
+        cabecera, muestra = _leer_muestra(url)
+        salida.extend(_reporte(cabecera, muestra))
+        return list(cabecera)
         
     except Exception as e:
-        print(f"❌ Error: {e}")
-        return None
+        salida.append(f"❌ Error: {e}")
+        columnas = _columnas_snapshot(url)
+        if columnas is not None:
+            salida.append(f"⚠️ Usando snapshot local con {len(columnas)} columnas")
+        return columnas
+    
+    finally:
+        print("\n".join(salida))
 
 if __name__ == "__main__":
-    columnas = inspeccionar_dataset()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Inspecciona la estructura del dataset COVID-19")
+    parser.add_argument("--columns-only", action="store_true",
+                        help="imprime solo la lista de columnas en JSON, sin el reporte")
+    args = parser.parse_args()
+    if args.columns_only:
+        print(json.dumps(leer_columnas()))
+    else:
+        columnas = inspeccionar_dataset()
\ No newline at end of file
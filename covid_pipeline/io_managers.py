@@ -0,0 +1,19 @@
+# io_managers.py
+import os
+import pandas as pd
+from dagster import ConfigurableIOManager, InputContext, OutputContext, MetadataValue
+
+class ParquetIOManager(ConfigurableIOManager):
+    base_dir: str = "./dagster_storage"
+
+    def _ruta(self, context: InputContext | OutputContext) -> str:
+        return os.path.join(self.base_dir, *context.asset_key.path) + ".parquet"
+
+    def handle_output(self, context: OutputContext, obj: pd.DataFrame) -> None:
+        ruta = self._ruta(context)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        obj.to_parquet(ruta, compression="zstd", index=False)
+        context.add_output_metadata({"ruta_parquet": MetadataValue.path(ruta)})
+
+    def load_input(self, context: InputContext) -> pd.DataFrame:
+        return pd.read_parquet(self._ruta(context))